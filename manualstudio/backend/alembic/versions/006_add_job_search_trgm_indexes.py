@@ -0,0 +1,43 @@
+"""Add trigram indexes for job title/goal search.
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-01-16
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "006"
+down_revision: str | None = "005"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # pg_trgm lets GIN indexes serve ILIKE '%q%' lookups, which works for Japanese
+    # text without a word tokenizer (tsvector would need whitespace-separated words)
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.create_index(
+        "ix_jobs_title_trgm",
+        "jobs",
+        ["title"],
+        postgresql_using="gin",
+        postgresql_ops={"title": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_jobs_goal_trgm",
+        "jobs",
+        ["goal"],
+        postgresql_using="gin",
+        postgresql_ops={"goal": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_jobs_goal_trgm", table_name="jobs")
+    op.drop_index("ix_jobs_title_trgm", table_name="jobs")
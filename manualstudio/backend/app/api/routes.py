@@ -2,17 +2,23 @@
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
 import os
 import uuid
 from datetime import datetime
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Literal
 from urllib.parse import quote
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile
+import orjson
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse, RedirectResponse, Response
 from pydantic import BaseModel
-from sqlalchemy import or_
+from sqlalchemy import bindparam, func, or_, select, update
 from sqlalchemy.orm import Session
 
 from app.core.config import get_settings
@@ -39,6 +45,33 @@ settings = get_settings()
 # Allowed video extensions
 ALLOWED_VIDEO_EXTENSIONS = {".mp4", ".mov", ".avi", ".mkv", ".webm"}
 
+# Leading bytes of supported containers: AVI (RIFF) and Matroska/WebM (EBML)
+_VIDEO_MAGIC = (b"RIFF", b"\x1a\x45\xdf\xa3")
+# MP4/MOV (ISO BMFF / QuickTime) start with a size-prefixed atom; these are its type
+_VIDEO_ATOM_TYPES = frozenset({b"ftyp", b"moov", b"mdat", b"wide", b"free", b"skip", b"pnot"})
+
+# Number of parsed transcripts kept in memory for SRT downloads
+TRANSCRIPT_CACHE_SIZE = 256
+
+# Case-insensitive status filter lookup for the job list
+_JOB_STATUS_BY_NAME = {s.value: s for s in JobStatus}
+_VALID_STATUS_VALUES = ", ".join(_JOB_STATUS_BY_NAME)
+
+# 409 details for cancel/retry, keyed by the job's current status
+_CANCEL_CONFLICT_DETAIL = {
+    s: f"Cannot cancel job in {s.value} status. Only QUEUED or RUNNING jobs can be canceled."
+    for s in JobStatus
+}
+_RETRY_CONFLICT_DETAIL = {
+    s: f"Cannot retry job in {s.value} status. Only FAILED jobs can be retried." for s in JobStatus
+}
+
+# ORDER BY clauses for the whitelisted job list sort values
+_SORT_MAP = {"created_at": Job.created_at.asc(), "-created_at": Job.created_at.desc()}
+
+# Job lookup by primary key, built once so every call reuses the compiled statement
+_GET_JOB_BY_ID = select(Job).where(Job.id == bindparam("job_id"))
+
 
 class StepsUpdateRequest(BaseModel):
     """Request body for updating steps."""
@@ -47,11 +80,62 @@ class StepsUpdateRequest(BaseModel):
     edit_note: str | None = None
 
 
+def _has_video_signature(file_obj) -> bool:
+    """Check the first bytes of an upload against known video container signatures."""
+    head = file_obj.read(12)
+    file_obj.seek(0)
+    return head.startswith(_VIDEO_MAGIC) or head[4:8] in _VIDEO_ATOM_TYPES
+
+
 def _build_content_disposition(filename: str) -> str:
     safe_name = quote(filename, safe="")
     return f"attachment; filename*=UTF-8''{safe_name}"
 
 
+def _batch_response(created_jobs: list[dict], errors: list[dict]) -> Response:
+    """Build the batch creation response (201 if any job was created, else 400)."""
+    return Response(
+        status_code=201 if created_jobs else 400,
+        content=orjson.dumps(
+            {
+                "created": created_jobs,
+                "errors": errors,
+                "total_created": len(created_jobs),
+                "total_errors": len(errors),
+            }
+        ),
+        media_type="application/json",
+    )
+
+
+def _conditional_json_response(request: Request, content: dict) -> Response:
+    """Return content as JSON with an ETag, or 304 if the client's copy is current."""
+    response = JSONResponse(content=content)
+    etag = f'"{hashlib.blake2b(response.body, digest_size=16).hexdigest()}"'
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        client_etags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if etag in client_etags or "*" in client_etags:
+            return Response(status_code=304, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    return response
+
+
+@lru_cache(maxsize=TRANSCRIPT_CACHE_SIZE)
+def _load_transcript_segments(key: str, etag: str) -> tuple[MappingProxyType, ...]:
+    """
+    Download and parse transcript segments from storage.
+
+    Cached per object version: a re-uploaded transcript gets a new ETag,
+    so stale entries are never served. Rows are read-only views so callers
+    cannot mutate the shared cache entry.
+    """
+    storage = get_storage_service()
+    return tuple(MappingProxyType(s) for s in orjson.loads(storage.download_bytes(key)))
+
+
 @router.post("/jobs")
 async def create_job(
     video_file: UploadFile = File(...),
@@ -82,6 +166,9 @@ async def create_job(
             detail=f"Unsupported video format: {ext}. Supported: mp4, mov, avi, mkv, webm",
         )
 
+    if not _has_video_signature(video_file.file):
+        raise HTTPException(status_code=400, detail="File content is not a recognized video")
+
     # Check file size
     video_file.file.seek(0, 2)
     file_size = video_file.file.tell()
@@ -151,6 +238,7 @@ async def create_job(
 
 @router.get("/jobs")
 async def list_jobs(
+    request: Request,
     status: str | None = Query(
         None, description="Filter by status (QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELED)"
     ),
@@ -158,6 +246,7 @@ async def list_jobs(
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
     sort: Literal["created_at", "-created_at"] = Query("-created_at", description="Sort order"),
+    include_total: bool = Query(True, description="Include total count and total_pages"),
     db: Session = Depends(get_db),
 ):
     """
@@ -168,22 +257,23 @@ async def list_jobs(
     - page: Page number (1-indexed)
     - page_size: Number of items per page (max 100)
     - sort: Sort by created_at (prefix with - for descending)
+    - include_total: Set to false to skip counting (total/total_pages are null)
+
+    Responses carry an ETag; send it back in If-None-Match to get 304 when unchanged.
     """
     query = db.query(Job)
 
     # Filter by status
     if status:
-        status_upper = status.upper()
-        try:
-            job_status = JobStatus(status_upper)
-            query = query.filter(Job.status == job_status)
-        except ValueError:
+        job_status = _JOB_STATUS_BY_NAME.get(status.upper())
+        if job_status is None:
             raise HTTPException(
                 status_code=400,
-                detail=f"Invalid status: {status}. Valid values: {', '.join([s.value for s in JobStatus])}",
+                detail=f"Invalid status: {status}. Valid values: {_VALID_STATUS_VALUES}",
             )
+        query = query.filter(Job.status == job_status)
 
-    # Search in title and goal
+    # Search in title and goal (ILIKE is served by pg_trgm GIN indexes on PostgreSQL)
     if q:
         search_pattern = f"%{q}%"
         query = query.filter(
@@ -193,26 +283,48 @@ async def list_jobs(
             )
         )
 
-    # Get total count
-    total = query.count()
-
     # Apply sorting
-    if sort == "-created_at":
-        query = query.order_by(Job.created_at.desc())
-    else:
-        query = query.order_by(Job.created_at.asc())
+    query = query.order_by(_SORT_MAP[sort])
 
-    # Apply pagination
     offset = (page - 1) * page_size
-    jobs = query.offset(offset).limit(page_size).all()
 
-    return {
-        "items": [job.to_dict() for job in jobs],
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-        "total_pages": (total + page_size - 1) // page_size if total > 0 else 0,
-    }
+    if include_total:
+        # Count with a window function so rows and total come back in one query
+        rows = (
+            query.add_columns(func.count().over().label("total"))
+            .offset(offset)
+            .limit(page_size)
+            .all()
+        )
+        jobs = [job for job, _ in rows]
+        if rows:
+            total = rows[0].total
+        elif offset:
+            # Page past the end: no rows to carry the window count
+            total = query.order_by(None).count()
+        else:
+            total = 0
+        total_pages = (total + page_size - 1) // page_size if total > 0 else 0
+        has_more = page < total_pages
+    else:
+        # Fetch one extra row to tell whether another page exists
+        jobs = query.offset(offset).limit(page_size + 1).all()
+        has_more = len(jobs) > page_size
+        jobs = jobs[:page_size]
+        total = None
+        total_pages = None
+
+    return _conditional_json_response(
+        request,
+        {
+            "items": [job.to_dict() for job in jobs],
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "total_pages": total_pages,
+            "has_more": has_more,
+        },
+    )
 
 
 @router.post("/jobs/batch")
@@ -236,120 +348,137 @@ async def create_batch_jobs(
     if len(video_files) > 10:
         raise HTTPException(status_code=400, detail="Maximum 10 files per batch")
 
+    storage = get_storage_service()
     created_jobs = []
     errors = []
+    pending: list[tuple[UploadFile, str, str, Job]] = []
 
     for idx, video_file in enumerate(video_files):
-        try:
-            # Generate trace ID for this job
-            trace_id = str(uuid.uuid4())[:8]
-
-            # Validate file extension
-            filename = video_file.filename or f"video_{idx}.mp4"
-            ext = os.path.splitext(filename)[1].lower()
-            if ext not in ALLOWED_VIDEO_EXTENSIONS:
-                errors.append(
-                    {
-                        "file": filename,
-                        "error": f"Unsupported video format: {ext}",
-                    }
-                )
-                continue
-
-            # Check file size
-            video_file.file.seek(0, 2)
-            file_size = video_file.file.tell()
-            video_file.file.seek(0)
-
-            max_size = settings.max_video_size_bytes
-            if file_size > max_size:
-                errors.append(
-                    {
-                        "file": filename,
-                        "error": f"File too large ({file_size / 1024 / 1024:.1f}MB)",
-                    }
-                )
-                continue
-
-            # Generate title from filename or prefix
-            base_name = os.path.splitext(filename)[0]
-            job_title = f"{title_prefix} - {base_name}" if title_prefix else base_name
-
-            # Create job record
-            job_id = uuid.uuid4()
-            job = Job(
-                id=job_id,
-                status=JobStatus.QUEUED,
-                title=job_title,
-                goal=goal,
-                language=language,
-                trace_id=trace_id,
+        # Validate file extension
+        filename = video_file.filename or f"video_{idx}.mp4"
+        ext = os.path.splitext(filename)[1].lower()
+        if ext not in ALLOWED_VIDEO_EXTENSIONS:
+            errors.append(
+                {
+                    "file": filename,
+                    "error": f"Unsupported video format: {ext}",
+                }
             )
-            db.add(job)
+            continue
 
-            # Upload video to storage
-            storage = get_storage_service()
-            video_key = f"jobs/{job_id}/input{ext}"
-            storage.upload_file(video_file.file, video_key, video_file.content_type)
-            job.input_video_uri = f"s3://{settings.s3_bucket}/{video_key}"
+        if not _has_video_signature(video_file.file):
+            errors.append({"file": filename, "error": "File content is not a recognized video"})
+            continue
 
-            # Queue the processing task
-            try:
-                celery_app.send_task(
-                    "app.workers.tasks.process_video",
-                    args=[str(job_id)],
-                    task_id=str(job_id),
-                )
-            except Exception as e:
-                db.rollback()
-                try:
-                    storage.delete_object(video_key)
-                except Exception as cleanup_error:
-                    logger.warning(f"Failed to cleanup uploaded video: {cleanup_error}")
-                errors.append(
-                    {
-                        "file": filename,
-                        "error": f"Failed to queue job: {e}",
-                    }
-                )
-                continue
-
-            db.commit()
-
-            created_jobs.append(
+        # Check file size
+        video_file.file.seek(0, 2)
+        file_size = video_file.file.tell()
+        video_file.file.seek(0)
+
+        max_size = settings.max_video_size_bytes
+        if file_size > max_size:
+            errors.append(
                 {
-                    "job_id": str(job_id),
                     "file": filename,
-                    "status": "QUEUED",
+                    "error": f"File too large ({file_size / 1024 / 1024:.1f}MB)",
                 }
             )
+            continue
 
-            logger.info(f"Batch job created: {job_id} for file {filename}")
+        # Generate title from filename or prefix
+        base_name = os.path.splitext(filename)[0]
+        job_title = f"{title_prefix} - {base_name}" if title_prefix else base_name
 
+        # Build job record (inserted once all uploads have finished)
+        job_id = uuid.uuid4()
+        video_key = f"jobs/{job_id}/input{ext}"
+        job = Job(
+            id=job_id,
+            status=JobStatus.QUEUED,
+            title=job_title,
+            goal=goal,
+            language=language,
+            trace_id=str(uuid.uuid4())[:8],
+            input_video_uri=f"s3://{settings.s3_bucket}/{video_key}",
+        )
+        pending.append((video_file, filename, video_key, job))
+
+    # Upload all videos concurrently (storage calls block, so run them in the threadpool)
+    upload_results = await asyncio.gather(
+        *(
+            run_in_threadpool(
+                storage.upload_file, video_file.file, video_key, video_file.content_type
+            )
+            for video_file, _, video_key, _ in pending
+        ),
+        return_exceptions=True,
+    )
+
+    uploaded: list[tuple[str, str, Job]] = []
+    for (_, filename, video_key, job), result in zip(pending, upload_results, strict=True):
+        if isinstance(result, Exception):
+            logger.error(f"Failed to upload video for {filename}: {result}")
+            errors.append({"file": filename, "error": str(result)})
+            continue
+        uploaded.append((filename, video_key, job))
+
+    if not uploaded:
+        return _batch_response(created_jobs, errors)
+
+    # Insert all job rows in a single transaction before queueing any task,
+    # so a worker never picks up a job ID that has no committed row yet
+    db.add_all([job for _, _, job in uploaded])
+    try:
+        db.commit()
+    except Exception as e:
+        logger.error(f"Failed to insert batch jobs: {e}")
+        db.rollback()
+        for _, video_key, _ in uploaded:
+            try:
+                storage.delete_object(video_key)
+            except Exception as cleanup_error:
+                logger.warning(f"Failed to cleanup uploaded video: {cleanup_error}")
+        raise HTTPException(status_code=500, detail="Failed to create jobs")
+
+    for filename, video_key, job in uploaded:
+        # Queue the processing task
+        try:
+            celery_app.send_task(
+                "app.workers.tasks.process_video",
+                args=[str(job.id)],
+                task_id=str(job.id),
+            )
         except Exception as e:
-            logger.error(f"Failed to create job for {video_file.filename}: {e}")
-            db.rollback()
-            if "video_key" in locals():
-                try:
-                    storage.delete_object(video_key)
-                except Exception as cleanup_error:
-                    logger.warning(f"Failed to cleanup uploaded video: {cleanup_error}")
+            logger.error(f"Failed to queue job {job.id}: {e}")
+            try:
+                db.delete(job)
+                db.commit()
+            except Exception as db_error:
+                logger.error(f"Failed to remove unqueued job {job.id}: {db_error}")
+                db.rollback()
+            try:
+                storage.delete_object(video_key)
+            except Exception as cleanup_error:
+                logger.warning(f"Failed to cleanup uploaded video: {cleanup_error}")
             errors.append(
                 {
-                    "file": video_file.filename or f"file_{idx}",
-                    "error": str(e),
+                    "file": filename,
+                    "error": f"Failed to queue job: {e}",
                 }
             )
+            continue
 
-    return JSONResponse(
-        status_code=201 if created_jobs else 400,
-        content={
-            "created": created_jobs,
-            "errors": errors,
-            "total_created": len(created_jobs),
-            "total_errors": len(errors),
-        },
-    )
+        created_jobs.append(
+            {
+                "job_id": str(job.id),
+                "file": filename,
+                "status": "QUEUED",
+            }
+        )
+
+        logger.info(f"Batch job created: {job.id} for file {filename}")
+
+    return _batch_response(created_jobs, errors)
 
 
 @router.get("/jobs/{job_id}")
@@ -874,8 +1003,11 @@ async def download_srt(job_id: str, db: Session = Depends(get_db)):
         try:
             storage = get_storage_service()
             key = storage.key_from_uri(job.transcript_uri)
-            content = storage.download_bytes(key)
-            transcript_segments = json.loads(content)
+            etag = storage.get_etag(key)
+            if etag:
+                transcript_segments = [dict(s) for s in _load_transcript_segments(key, etag)]
+            else:
+                transcript_segments = orjson.loads(storage.download_bytes(key))
         except Exception as e:
             logger.warning(f"Failed to load transcript from storage: {e}")
 
@@ -921,23 +1053,24 @@ async def cancel_job(job_id: str, db: Session = Depends(get_db)):
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid job ID format")
 
-    job = db.query(Job).filter(Job.id == job_uuid).first()
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
-
-    if job.status not in [JobStatus.QUEUED, JobStatus.RUNNING]:
-        raise HTTPException(
-            status_code=409,
-            detail=f"Cannot cancel job in {job.status.value} status. Only QUEUED or RUNNING jobs can be canceled.",
-        )
+    # Conditional update: the status check and the write happen in one statement,
+    # so no row lock is held while talking to the broker below
+    result = db.execute(
+        update(Job)
+        .where(Job.id == job_uuid, Job.status.in_([JobStatus.QUEUED, JobStatus.RUNNING]))
+        .values(status=JobStatus.CANCELED, updated_at=datetime.utcnow())
+    )
+    if result.rowcount == 0:
+        db.rollback()
+        job_status = db.execute(select(Job.status).where(Job.id == job_uuid)).scalar_one_or_none()
+        if job_status is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        raise HTTPException(status_code=409, detail=_CANCEL_CONFLICT_DETAIL[job_status])
+    db.commit()
 
     # Revoke Celery task
     celery_app.control.revoke(str(job_id), terminate=True)
 
-    job.status = JobStatus.CANCELED
-    job.updated_at = datetime.utcnow()
-    db.commit()
-
     logger.info(f"Job canceled: {job_id}")
 
     return {"job_id": str(job_id), "status": "CANCELED", "message": "Job canceled successfully"}
@@ -957,15 +1090,12 @@ async def retry_job(job_id: str, db: Session = Depends(get_db)):
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid job ID format")
 
-    job = db.query(Job).filter(Job.id == job_uuid).first()
+    job = db.execute(_GET_JOB_BY_ID, {"job_id": job_uuid}).scalar_one_or_none()
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
 
     if job.status != JobStatus.FAILED:
-        raise HTTPException(
-            status_code=409,
-            detail=f"Cannot retry job in {job.status.value} status. Only FAILED jobs can be retried.",
-        )
+        raise HTTPException(status_code=409, detail=_RETRY_CONFLICT_DETAIL[job.status])
 
     # Check if input video still exists
     if not job.input_video_uri:
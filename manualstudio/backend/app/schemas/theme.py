@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import re
+from functools import lru_cache
 
 from pydantic import BaseModel, Field, field_validator
 
@@ -111,17 +112,28 @@ def get_default_theme() -> Theme:
     return Theme()
 
 
+@lru_cache(maxsize=128)
+def _theme_from_items(items: tuple) -> Theme:
+    """Build a Theme from sorted (field, value) pairs; Pydantic applies defaults."""
+    return Theme(**dict(items))
+
+
 def merge_theme_with_defaults(theme_json: dict | None) -> Theme:
     """Merge stored theme JSON with defaults.
 
+    Validation is memoized per distinct theme content; each caller gets its own copy.
+
     Args:
         theme_json: Stored theme configuration (may be None or partial)
 
     Returns:
         Complete Theme object with defaults applied
     """
-    if theme_json is None:
-        return get_default_theme()
-
-    # Create theme from stored data, Pydantic will apply defaults
-    return Theme(**theme_json)
+    # Unknown keys are ignored by Theme, so they are left out of the cache key
+    items = tuple(sorted((k, v) for k, v in (theme_json or {}).items() if k in Theme.model_fields))
+    try:
+        hash(items)
+    except TypeError:
+        # Unhashable stored value: validate without caching
+        return Theme(**theme_json)
+    return _theme_from_items(items).model_copy()
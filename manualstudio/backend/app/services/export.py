@@ -16,10 +16,14 @@ def _format_srt_timestamp(seconds: float) -> str:
     Returns:
         SRT formatted timestamp (e.g., "00:01:05,500")
     """
-    total_millis = max(0, int(round(seconds * 1000)))
+    if seconds <= 0:
+        return "00:00:00,000"
 
-    hours, remainder = divmod(total_millis, 3600 * 1000)
-    minutes, remainder = divmod(remainder, 60 * 1000)
+    # Round once to integer milliseconds so the divisions below are exact
+    total_millis = int(round(seconds * 1000))
+
+    hours, remainder = divmod(total_millis, 3_600_000)
+    minutes, remainder = divmod(remainder, 60_000)
     secs, millis = divmod(remainder, 1000)
 
     return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
@@ -38,38 +42,29 @@ def generate_srt(transcript_segments: list[dict[str, Any]]) -> str:
     if not transcript_segments:
         return ""
 
-    lines: list[str] = []
-    sequence = 1
+    entries: list[str] = []
+    sequence = 0
 
     segments_sorted = sorted(transcript_segments, key=lambda s: s.get("start_sec", 0))
 
     for segment in segments_sorted:
-        start_sec = float(segment.get("start_sec", 0) or 0)
-        end_sec = float(segment.get("end_sec", 0) or 0)
-        text = segment.get("text", "").strip()
-
+        text = (segment.get("text") or "").strip()
         if not text:
             continue
 
-        if end_sec < start_sec:
-            end_sec = start_sec
+        start_sec = float(segment.get("start_sec", 0) or 0)
+        end_sec = max(float(segment.get("end_sec", 0) or 0), start_sec)
 
-        # Sequence number
-        lines.append(str(sequence))
+        # One entry per cue: sequence number, timestamp line, text (can be multiline)
         sequence += 1
-
-        # Timestamp line
-        start_ts = _format_srt_timestamp(start_sec)
-        end_ts = _format_srt_timestamp(end_sec)
-        lines.append(f"{start_ts} --> {end_ts}")
-
-        # Text (can be multiline)
-        lines.append(text)
-
-        # Blank line separator
-        lines.append("")
-
-    return "\n".join(lines)
+        entries.append(
+            f"{sequence}\n"
+            f"{_format_srt_timestamp(start_sec)} --> {_format_srt_timestamp(end_sec)}\n"
+            f"{text}\n"
+        )
+
+    # Entries are separated by a blank line
+    return "\n".join(entries)
 
 
 def generate_markdown(steps_data: dict[str, Any]) -> str:
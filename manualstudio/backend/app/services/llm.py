@@ -296,18 +296,18 @@ class LLMService:
 
     def __init__(self, provider: str | None = None):
         settings = get_settings()
-        provider_name = provider or settings.llm_provider
+        self._provider = self._build_provider(provider or settings.llm_provider)
 
+    @staticmethod
+    def _build_provider(provider_name: str) -> LLMProvider:
+        """Instantiate the provider for a configured name ("claude" is an alias of anthropic)."""
         if provider_name == "openai":
-            self._provider = OpenAILLMProvider()
-        elif provider_name == "anthropic" or provider_name == "claude":
-            self._provider = AnthropicLLMProvider()
-        elif provider_name == "mock":
-            self._provider = MockLLMProvider()
-        else:
-            raise LLMError(
-                f"Unknown LLM provider: {provider_name}", ErrorCode.LLM_PROVIDER_ERROR.value
-            )
+            return OpenAILLMProvider()
+        if provider_name == "anthropic" or provider_name == "claude":
+            return AnthropicLLMProvider()
+        if provider_name == "mock":
+            return MockLLMProvider()
+        raise LLMError(f"Unknown LLM provider: {provider_name}", ErrorCode.LLM_PROVIDER_ERROR.value)
 
     @property
     def provider_name(self) -> str:
@@ -3,6 +3,8 @@
 from __future__ import annotations
 
 import os
+import re
+from functools import lru_cache
 from io import BytesIO
 
 from pptx import Presentation
@@ -15,21 +17,31 @@ from app.schemas.theme import Theme, get_default_theme
 
 logger = get_logger(__name__)
 
+# Six hex digits; int(..., 16) alone would also accept "0x", signs, spaces and "_"
+_HEX_DIGITS_RE = re.compile(r"[0-9A-Fa-f]{6}")
 
+
+@lru_cache(maxsize=64)
 def hex_to_rgb(hex_color: str) -> RGBColor:
     """Convert hex color string to RGBColor.
 
+    Memoized: every slide of a deck converts the same theme color, and
+    RGBColor is an immutable tuple, so the result can be shared.
+
     Args:
         hex_color: Hex color string (e.g., "#667EEA")
 
     Returns:
         RGBColor object
+
+    Raises:
+        ValueError: If hex_color is not six hex digits (with optional "#")
     """
-    hex_color = hex_color.lstrip("#")
-    r = int(hex_color[0:2], 16)
-    g = int(hex_color[2:4], 16)
-    b = int(hex_color[4:6], 16)
-    return RGBColor(r, g, b)
+    digits = hex_color.lstrip("#")
+    if not _HEX_DIGITS_RE.fullmatch(digits):
+        raise ValueError(f"Invalid hex color: {hex_color}")
+    value = int(digits, 16)
+    return RGBColor(value >> 16, (value >> 8) & 0xFF, value & 0xFF)
 
 
 class PPTXGenerator:
@@ -9,6 +9,7 @@ from functools import lru_cache
 from typing import BinaryIO
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.config import Config
 from botocore.exceptions import ClientError
 
@@ -18,6 +19,15 @@ from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Uploads are streamed from the file object in multipart chunks, so memory use
+# stays bounded by the chunk size rather than the video size.
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+UPLOAD_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=UPLOAD_CHUNK_SIZE,
+    multipart_chunksize=UPLOAD_CHUNK_SIZE,
+    use_threads=True,
+)
+
 
 class StorageService:
     """S3/MinIO storage service."""
@@ -54,7 +64,11 @@ class StorageService:
                 extra_args["ContentType"] = content_type
 
             self.client.upload_fileobj(
-                file_obj, self.bucket, key, ExtraArgs=extra_args if extra_args else None
+                file_obj,
+                self.bucket,
+                key,
+                ExtraArgs=extra_args if extra_args else None,
+                Config=UPLOAD_TRANSFER_CONFIG,
             )
 
             uri = f"s3://{self.bucket}/{key}"
@@ -99,6 +113,15 @@ class StorageService:
             logger.error(f"Failed to download file {key}: {e}")
             raise StorageError(f"Failed to download file: {e}")
 
+    def get_etag(self, key: str) -> str | None:
+        """Get the ETag of an object, or None if it cannot be read."""
+        try:
+            response = self.client.head_object(Bucket=self.bucket, Key=key)
+            return response.get("ETag")
+        except ClientError as e:
+            logger.warning(f"Failed to read ETag for {key}: {e}")
+            return None
+
     def get_presigned_url(
         self,
         key: str,
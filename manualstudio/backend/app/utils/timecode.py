@@ -1,5 +1,8 @@
 """Timecode utilities."""
 
+# Zero-padded "00".."99"; indexing is cheaper than a :02d format per field
+_TWO_DIGIT = tuple(f"{i:02d}" for i in range(100))
+
 
 def seconds_to_mmss(seconds: float) -> str:
     """
@@ -13,7 +16,8 @@ def seconds_to_mmss(seconds: float) -> str:
     """
     minutes = int(seconds // 60)
     secs = int(seconds % 60)
-    return f"{minutes:02d}:{secs:02d}"
+    mm = _TWO_DIGIT[minutes] if 0 <= minutes < 100 else f"{minutes:02d}"
+    return f"{mm}:{_TWO_DIGIT[secs]}"
 
 
 def mmss_to_seconds(mmss: str) -> float:
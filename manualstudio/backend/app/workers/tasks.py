@@ -7,6 +7,7 @@ import tempfile
 import uuid
 from datetime import datetime
 
+import orjson
 from celery import Task
 from sqlalchemy.orm import Session
 
@@ -181,9 +182,7 @@ def process_video(self, job_id: str):
             job.transcript_segments = transcript_segments
 
             # Save transcript segments to storage
-            transcript_bytes = json.dumps(transcript_segments, ensure_ascii=False, indent=2).encode(
-                "utf-8"
-            )
+            transcript_bytes = orjson.dumps(transcript_segments, option=orjson.OPT_INDENT_2)
             transcript_key = f"jobs/{job_id}/transcript/segments.json"
             storage.upload_bytes(transcript_bytes, transcript_key, "application/json")
             job.transcript_uri = f"s3://{settings.s3_bucket}/{transcript_key}"
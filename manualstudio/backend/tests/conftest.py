@@ -1,16 +1,21 @@
 """Pytest fixtures for ManualStudio tests."""
 
+import hashlib
 import json
+import struct
+import sys
 import tempfile
+import types
 import uuid
+import zlib
 from collections.abc import Generator
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
 from sqlalchemy.pool import StaticPool
 
 from app.core.config import Settings
@@ -22,6 +27,21 @@ from app.main import app
 FIXTURES_DIR = Path(__file__).parent / "fixtures"
 
 
+def pytest_addoption(parser):
+    """Add the --run-slow flag."""
+    parser.addoption("--run-slow", action="store_true", default=False, help="run tests marked slow")
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip tests marked slow unless --run-slow is given."""
+    if config.getoption("--run-slow"):
+        return
+    skip_slow = pytest.mark.skip(reason="needs --run-slow")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip_slow)
+
+
 # ============================================================================
 # Test Settings
 # ============================================================================
@@ -44,33 +64,74 @@ def test_settings():
     )
 
 
+class _FakeAnthropicClient:
+    """Minimal anthropic.Anthropic replacement; records the key it was built with."""
+
+    def __init__(self, api_key: str | None = None, **kwargs):
+        self.api_key = api_key
+
+
+@pytest.fixture(scope="session")
+def anthropic_sdk_stub() -> Generator[types.ModuleType, None, None]:
+    """Stand-in anthropic SDK module, registered in sys.modules once for the session."""
+    stub = types.ModuleType("anthropic")
+    stub.Anthropic = _FakeAnthropicClient
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setitem(sys.modules, "anthropic", stub)
+        yield stub
+
+
 # ============================================================================
 # Database Fixtures
 # ============================================================================
 
 
-@pytest.fixture(scope="function")
+@pytest.fixture(scope="session")
 def test_db_engine():
-    """Create a test database engine with SQLite in-memory."""
+    """Create a test database engine with SQLite in-memory (schema built once)."""
     engine = create_engine(
         "sqlite:///:memory:",
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
     )
+
+    # Let SQLAlchemy (not pysqlite) emit BEGIN so SAVEPOINTs work
+    @event.listens_for(engine, "connect")
+    def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
     Base.metadata.create_all(bind=engine)
     yield engine
     Base.metadata.drop_all(bind=engine)
+    engine.dispose()
 
 
 @pytest.fixture(scope="function")
 def test_db_session(test_db_engine) -> Generator[Session, None, None]:
-    """Create a test database session."""
-    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_db_engine)
-    session = TestingSessionLocal()
+    """
+    Create a test database session isolated in a rolled-back transaction.
+
+    commit()/rollback() inside the test (and the routes under test) only
+    release or roll back SAVEPOINTs; the outer transaction is rolled back on
+    teardown so every test starts from an empty database.
+    """
+    connection = test_db_engine.connect()
+    transaction = connection.begin()
+    session = Session(
+        bind=connection,
+        autoflush=False,
+        join_transaction_mode="create_savepoint",
+    )
     try:
         yield session
     finally:
         session.close()
+        transaction.rollback()
+        connection.close()
 
 
 @pytest.fixture(scope="function")
@@ -92,12 +153,11 @@ def override_get_db(test_db_session):
 
 
 class MockStorageService:
-    """Mock storage service for testing."""
+    """In-memory storage service for testing (no S3 client or network)."""
 
     def __init__(self):
         self._storage: dict[str, bytes] = {}
         self.bucket = "test-bucket"
-        self.client = MagicMock()
 
     def upload_file(self, file_obj, key: str, content_type: str = None):
         """Upload file to mock storage."""
@@ -125,6 +185,24 @@ class MockStorageService:
             return self._storage[key]
         raise Exception(f"Key not found: {key}")
 
+    def get_etag(self, key: str) -> str | None:
+        """Get mock ETag (MD5 of content, as S3 does for single-part uploads)."""
+        if key in self._storage:
+            return f'"{hashlib.md5(self._storage[key]).hexdigest()}"'
+        return None
+
+    def list_objects(self, prefix: str) -> list[dict]:
+        """List mock objects with given prefix."""
+        return [
+            {"Key": key, "Size": len(data)}
+            for key, data in self._storage.items()
+            if key.startswith(prefix)
+        ]
+
+    def delete_object(self, key: str) -> None:
+        """Delete object from mock storage."""
+        self._storage.pop(key, None)
+
     def key_from_uri(self, uri: str) -> str:
         """Extract key from S3 URI."""
         if uri.startswith("s3://"):
@@ -169,25 +247,29 @@ def mock_celery():
     return MockCeleryApp()
 
 
+@pytest.fixture(scope="session")
+def app_client() -> Generator[TestClient, None, None]:
+    """Shared test client; the app lifespan runs once per test session."""
+    with TestClient(app) as test_client:
+        yield test_client
+
+
 @pytest.fixture(scope="function")
 def client(
-    override_get_db, mock_storage, mock_celery, test_settings
+    app_client, override_get_db, mock_storage, mock_celery, monkeypatch
 ) -> Generator[TestClient, None, None]:
     """Create test client with mocked dependencies."""
     # Override database dependency
     app.dependency_overrides[get_db] = override_get_db
 
-    # Patch settings, storage, and celery
-    with (
-        patch("app.core.config.get_settings", return_value=test_settings),
-        patch("app.services.storage.get_storage_service", return_value=mock_storage),
-        patch("app.api.routes.get_storage_service", return_value=mock_storage),
-        patch("app.api.routes.celery_app", mock_celery),
-    ):
-        with TestClient(app) as test_client:
-            yield test_client
+    # Routes bind storage and celery at import time, so patch them where they are used
+    monkeypatch.setattr("app.api.routes.get_storage_service", lambda: mock_storage)
+    monkeypatch.setattr("app.api.routes.celery_app", mock_celery)
+
+    yield app_client
 
     app.dependency_overrides.clear()
+    app_client.cookies.clear()
 
 
 # ============================================================================
@@ -230,10 +312,8 @@ def succeeded_job(test_db_session) -> Job:
         frames_prefix_uri="s3://test-bucket/jobs/test/frames/",
         current_steps_version=1,
     )
-    test_db_session.add(job)
-    test_db_session.commit()
 
-    # Add initial steps version
+    # Add initial steps version in the same commit as the job
     steps_data = load_fixture("steps.json")
     steps_version = StepsVersion(
         job_id=job.id,
@@ -242,7 +322,7 @@ def succeeded_job(test_db_session) -> Job:
         edit_source="llm",
         edit_note="Initial generation",
     )
-    test_db_session.add(steps_version)
+    test_db_session.add_all([job, steps_version])
     test_db_session.commit()
     test_db_session.refresh(job)
     return job
@@ -272,6 +352,35 @@ def steps_fixture() -> dict:
     return load_fixture("steps.json")
 
 
+def _build_minimal_png() -> bytes:
+    """Build a minimal valid 1x1 RGB PNG (a single red pixel)."""
+
+    def chunk(chunk_type: bytes, data: bytes) -> bytes:
+        crc = zlib.crc32(chunk_type + data) & 0xFFFFFFFF
+        return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", crc)
+
+    signature = b"\x89PNG\r\n\x1a\n"
+    # width, height, bit depth, color type (2 = RGB), compression, filter, interlace
+    ihdr = struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0)
+    # Filter byte + RGB
+    idat = zlib.compress(b"\x00\xff\x00\x00")
+    return signature + chunk(b"IHDR", ihdr) + chunk(b"IDAT", idat) + chunk(b"IEND", b"")
+
+
+@pytest.fixture(scope="session")
+def minimal_png_bytes() -> bytes:
+    """Minimal valid PNG image, built once per session."""
+    return _build_minimal_png()
+
+
+@pytest.fixture(scope="session")
+def logo_png_path(tmp_path_factory, minimal_png_bytes) -> str:
+    """Path to the minimal PNG written once to a session temp directory."""
+    path = tmp_path_factory.mktemp("logo") / "logo.png"
+    path.write_bytes(minimal_png_bytes)
+    return str(path)
+
+
 # ============================================================================
 # Temp Files
 # ============================================================================
@@ -2,6 +2,9 @@
 
 import uuid
 
+import pytest
+
+from app.api.routes import _load_transcript_segments
 from app.db.models import Job, JobStatus
 from app.services.export import (
     _format_srt_timestamp,
@@ -408,6 +411,12 @@ class TestSRTTimestampFormatting:
         result = _format_srt_timestamp(-5.0)
         assert result == "00:00:00,000"
 
+    def test_format_float_artifacts_round_to_nearest_millisecond(self):
+        """Test that binary-float artifacts (e.g. 4.35 * 1000 == 4349.999...) are rounded."""
+        assert _format_srt_timestamp(4.35) == "00:00:04,350"
+        assert _format_srt_timestamp(1.005) == "00:00:01,005"
+        assert _format_srt_timestamp(59.9996) == "00:01:00,000"
+
 
 class TestSRTGeneration:
     """Test SRT generation from transcript segments."""
@@ -474,6 +483,19 @@ class TestSRTGeneration:
         sequence_numbers = [line for line in lines if line.isdigit()]
         assert sequence_numbers == ["1", "2"]
 
+    def test_srt_exact_output(self):
+        """Test the exact SRT layout, including None text and end < start clamping."""
+        segments = [
+            {"start_sec": 5, "end_sec": 3, "text": "Second"},
+            {"start_sec": 0, "end_sec": 2.5, "text": "First"},
+            {"start_sec": 8, "end_sec": 9, "text": None},
+        ]
+        srt = generate_srt(segments)
+
+        assert srt == (
+            "1\n00:00:00,000 --> 00:00:02,500\nFirst\n\n2\n00:00:05,000 --> 00:00:05,000\nSecond\n"
+        )
+
     def test_srt_long_video_timestamps(self):
         """Test SRT with timestamps over an hour."""
         segments = [
@@ -546,6 +568,57 @@ class TestSRTAPIEndpoints:
         content = response.text
         assert "ストレージからのテキスト" in content
 
+    def test_download_srt_reuses_cached_transcript(
+        self, client, succeeded_job, test_db_session, mock_storage
+    ):
+        """Test that repeated SRT downloads parse an unchanged transcript only once."""
+        import json
+
+        transcript_key = f"jobs/{succeeded_job.id}/transcript/segments.json"
+        mock_storage.upload_bytes(
+            json.dumps([{"start_sec": 0, "end_sec": 5, "text": "v1"}]).encode("utf-8"),
+            transcript_key,
+            "application/json",
+        )
+        succeeded_job.transcript_uri = f"s3://test-bucket/{transcript_key}"
+        test_db_session.commit()
+
+        downloaded_keys = []
+        original_download = mock_storage.download_bytes
+
+        def counting_download(key):
+            downloaded_keys.append(key)
+            return original_download(key)
+
+        mock_storage.download_bytes = counting_download
+
+        for _ in range(3):
+            response = client.get(f"/api/jobs/{succeeded_job.id}/download/srt")
+            assert response.status_code == 200
+            assert "v1" in response.text
+        assert downloaded_keys == [transcript_key]
+
+        # A new upload changes the ETag, so the new content is served
+        mock_storage.upload_bytes(
+            json.dumps([{"start_sec": 0, "end_sec": 5, "text": "v2"}]).encode("utf-8"),
+            transcript_key,
+            "application/json",
+        )
+        response = client.get(f"/api/jobs/{succeeded_job.id}/download/srt")
+        assert "v2" in response.text
+        assert len(downloaded_keys) == 2
+
+    def test_cached_transcript_rows_are_read_only(self, mock_storage, monkeypatch):
+        """Test that cached transcript rows cannot be mutated by callers."""
+        key = f"jobs/{uuid.uuid4()}/transcript/segments.json"
+        mock_storage.upload_bytes(b'[{"start_sec": 0, "end_sec": 5, "text": "v1"}]', key)
+        monkeypatch.setattr("app.api.routes.get_storage_service", lambda: mock_storage)
+
+        rows = _load_transcript_segments(key, mock_storage.get_etag(key))
+        with pytest.raises(TypeError):
+            rows[0]["text"] = "changed"
+        assert _load_transcript_segments(key, mock_storage.get_etag(key))[0]["text"] == "v1"
+
     def test_download_srt_job_not_found(self, client):
         """Test SRT download with non-existent job."""
         fake_id = str(uuid.uuid4())
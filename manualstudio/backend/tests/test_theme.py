@@ -1,8 +1,10 @@
 """Tests for theme functionality."""
 
 import io
-import os
-import tempfile
+import re
+import time
+import uuid
+import zipfile
 
 import pytest
 from pptx import Presentation
@@ -13,6 +15,7 @@ from app.schemas.theme import (
     MAX_LOGO_SIZE_BYTES,
     Theme,
     ThemeUpdate,
+    _theme_from_items,
     get_default_theme,
     merge_theme_with_defaults,
 )
@@ -32,27 +35,28 @@ class TestThemeSchema:
         assert theme.show_logo is True
         assert theme.show_footer is True
 
-    def test_valid_hex_colors(self):
-        """Test valid hex color formats."""
-        valid_colors = ["#667EEA", "#FF0000", "#00ff00", "#123456", "#ABCDEF"]
-        for color in valid_colors:
-            theme = Theme(primary_color=color)
-            assert theme.primary_color == color.upper()
+    @pytest.mark.parametrize("color", ["#667EEA", "#FF0000", "#00ff00", "#123456", "#ABCDEF"])
+    def test_valid_hex_color(self, color):
+        """Test valid hex color formats are accepted and normalized to uppercase."""
+        theme = Theme(primary_color=color)
+        assert theme.primary_color == color.upper()
 
-    def test_invalid_hex_colors(self):
-        """Test invalid hex color formats return 422."""
-        invalid_colors = [
+    @pytest.mark.parametrize(
+        "color",
+        [
             "667EEA",  # Missing #
             "#FFF",  # Too short (3 digits)
             "#GGGGGG",  # Invalid hex chars
             "red",  # Named color
             "#12345",  # 5 digits
             "#1234567",  # 7 digits
-        ]
-        for color in invalid_colors:
-            with pytest.raises(ValueError) as exc_info:
-                Theme(primary_color=color)
-            assert "Invalid color format" in str(exc_info.value)
+        ],
+    )
+    def test_invalid_hex_color(self, color):
+        """Test invalid hex color formats are rejected."""
+        with pytest.raises(ValueError) as exc_info:
+            Theme(primary_color=color)
+        assert "Invalid color format" in str(exc_info.value)
 
     def test_footer_text_max_length(self):
         """Test footer text length validation."""
@@ -105,6 +109,32 @@ class TestThemeSchema:
         assert theme.show_logo is False
         assert theme.show_footer is False
 
+    def test_merge_theme_with_defaults_is_memoized(self):
+        """Test that equal theme_json content is validated once, in any key order."""
+        merge_theme_with_defaults({"primary_color": "#ABCDEF", "show_logo": False})
+        hits = _theme_from_items.cache_info().hits
+        theme = merge_theme_with_defaults({"show_logo": False, "primary_color": "#ABCDEF"})
+        assert _theme_from_items.cache_info().hits == hits + 1
+        assert theme.primary_color == "#ABCDEF"
+        assert theme.show_logo is False
+
+    def test_merge_theme_with_defaults_returns_independent_copies(self):
+        """Test that mutating a merged theme does not leak into later calls."""
+        first = merge_theme_with_defaults({"footer_text": "Original"})
+        first.footer_text = "Mutated"
+        assert merge_theme_with_defaults({"footer_text": "Original"}).footer_text == "Original"
+
+    def test_merge_theme_with_defaults_unhashable_values(self):
+        """Test that list/dict values in stored theme_json do not break merging."""
+        theme = merge_theme_with_defaults(
+            {"primary_color": "#123456", "legacy_palette": ["#000000"], "extra": {"a": 1}}
+        )
+        assert theme.primary_color == "#123456"
+
+        # Unhashable value in a known field falls back to plain validation
+        with pytest.raises(ValueError):
+            merge_theme_with_defaults({"footer_text": ["not", "text"]})
+
 
 class TestThemeUpdate:
     """Tests for ThemeUpdate schema."""
@@ -125,35 +155,98 @@ class TestThemeUpdate:
 class TestHexToRgb:
     """Tests for hex_to_rgb conversion."""
 
-    def test_hex_to_rgb_basic(self):
-        """Test basic hex to RGB conversion."""
-        rgb = hex_to_rgb("#FF0000")  # Red
+    @pytest.mark.parametrize(
+        ("hex_color", "expected"),
+        [("#FF0000", (255, 0, 0)), ("#00FF00", (0, 255, 0)), ("#667EEA", (102, 126, 234))],
+        ids=["red", "green", "default-purple"],
+    )
+    def test_hex_to_rgb(self, hex_color, expected):
+        """Test hex to RGB conversion of each channel."""
+        rgb = hex_to_rgb(hex_color)
         # RGBColor is tuple-like: (r, g, b)
-        assert rgb[0] == 255  # red
-        assert rgb[1] == 0  # green
-        assert rgb[2] == 0  # blue
+        assert (rgb[0], rgb[1], rgb[2]) == expected
+
+    @pytest.mark.parametrize("hex_color", ["#FFF", "0xFFFFFF", "#0xFFFF", "#-FFFFF", "#FF_FFF"])
+    def test_hex_to_rgb_rejects_malformed(self, hex_color):
+        """Test that anything but six hex digits raises instead of yielding a wrong color."""
+        with pytest.raises(ValueError):
+            hex_to_rgb(hex_color)
+
+    def test_hex_to_rgb_is_memoized(self):
+        """Test that repeated conversions of one color share a single RGBColor."""
+        assert hex_to_rgb("#667EEA") is hex_to_rgb("#667EEA")
+
+
+def _make_steps(n: int) -> list[dict]:
+    """Build n minimal steps with sequential numbers, timecodes and frame files."""
+    return [
+        {
+            "no": i,
+            "telop": f"Step {i}",
+            "action": "Do something",
+            "start": f"{(i - 1) // 6:02d}:{(i - 1) % 6 * 10:02d}",
+            "end": f"{i // 6:02d}:{i % 6 * 10:02d}",
+            "frame_file": f"step_{i:03d}.png",
+        }
+        for i in range(1, n + 1)
+    ]
+
+
+# Slide parts inside the PPTX ZIP (excludes layouts, masters and .rels)
+_SLIDE_PART_RE = re.compile(r"ppt/slides/slide\d+\.xml")
+
+
+def _pptx_slides_contain(pptx_bytes: bytes, needle: str) -> bool:
+    """Scan the raw slide XML for text, without building a python-pptx object tree."""
+    encoded = needle.encode("utf-8")
+    with zipfile.ZipFile(io.BytesIO(pptx_bytes)) as zf:
+        return any(
+            encoded in zf.read(name) for name in zf.namelist() if _SLIDE_PART_RE.fullmatch(name)
+        )
+
+
+def _pptx_has_media(pptx_bytes: bytes) -> bool:
+    """Check whether the package embeds any media part (e.g. a logo image)."""
+    with zipfile.ZipFile(io.BytesIO(pptx_bytes)) as zf:
+        return any(name.startswith("ppt/media/") for name in zf.namelist())
 
-    def test_hex_to_rgb_with_hash(self):
-        """Test hex to RGB with hash prefix."""
-        rgb = hex_to_rgb("#00FF00")  # Green
-        assert rgb[0] == 0  # red
-        assert rgb[1] == 255  # green
-        assert rgb[2] == 0  # blue
 
-    def test_hex_to_rgb_mixed(self):
-        """Test hex to RGB with mixed values."""
-        rgb = hex_to_rgb("#667EEA")  # Default purple
-        assert rgb[0] == 102  # red
-        assert rgb[1] == 126  # green
-        assert rgb[2] == 234  # blue
+def _render(generator: PPTXGenerator, steps_data: dict, **kwargs) -> Presentation:
+    """Generate a deck without frame images and parse it for inspection."""
+    return Presentation(io.BytesIO(generator.generate(steps_data, {}, **kwargs)))
+
+
+@pytest.fixture(scope="class")
+def generator() -> PPTXGenerator:
+    """Generator shared per test class; generate() builds a fresh Presentation per call."""
+    return PPTXGenerator()
+
+
+_FOOTER_TEXT = "© 2026 Test Company"
+
+
+@pytest.fixture(scope="class")
+def themed_pptx(request, generator, logo_png_path) -> bytes:
+    """Title-only deck for a (show_footer, show_logo) pair, generated once per class and pair.
+
+    Request it through indirect parametrization; tests sharing a pair share the bytes.
+    """
+    show_footer, show_logo = request.param
+    theme = Theme(
+        footer_text=_FOOTER_TEXT,
+        show_footer=show_footer,
+        show_logo=show_logo,
+        logo_uri="s3://bucket/logo.png",
+    )
+    steps_data = {"title": "Test Manual", "steps": []}
+    return generator.generate(steps_data, {}, theme=theme, logo_path=logo_png_path)
 
 
 class TestPPTXGeneratorWithTheme:
     """Tests for PPTX generation with theme support."""
 
-    def test_generate_with_default_theme(self):
+    def test_generate_with_default_theme(self, generator):
         """Test PPTX generation with default theme."""
-        generator = PPTXGenerator()
         steps_data = {
             "title": "Test Manual",
             "goal": "Test Goal",
@@ -177,9 +270,26 @@ class TestPPTXGeneratorWithTheme:
         prs = Presentation(io.BytesIO(pptx_bytes))
         assert len(prs.slides) >= 2  # Title + at least 1 step
 
-    def test_generate_with_custom_primary_color(self):
+    def test_generate_one_slide_per_step(self, generator):
+        """Test that a multi-step manual yields a title slide plus one slide per step."""
+        prs = _render(generator, {"title": "Test Manual", "steps": _make_steps(50)})
+        assert len(prs.slides) == 51
+
+    @pytest.mark.slow
+    def test_generation_scales_linearly(self, generator):
+        """Test that generation time grows linearly with slide count, not quadratically."""
+
+        def timed(n: int) -> float:
+            steps_data = {"title": "Test Manual", "steps": _make_steps(n)}
+            start = time.perf_counter()
+            generator.generate(steps_data, {})
+            return time.perf_counter() - start
+
+        # 4x the slides: linear is ~4x, quadratic part numbering would be ~16x
+        assert timed(400) / timed(100) < 8.0
+
+    def test_generate_with_custom_primary_color(self, generator):
         """Test PPTX generation applies custom primary color to titles."""
-        generator = PPTXGenerator()
         theme = Theme(primary_color="#FF0000")  # Red
         steps_data = {
             "title": "Test Manual",
@@ -195,212 +305,83 @@ class TestPPTXGeneratorWithTheme:
             ],
         }
 
-        pptx_bytes = generator.generate(steps_data, {}, theme=theme)
-
         # Verify the PPTX contains red color
-        prs = Presentation(io.BytesIO(pptx_bytes))
+        prs = _render(generator, steps_data, theme=theme)
 
         # Find title text box in first slide and check color
         title_slide = prs.slides[0]
-        found_red = False
-        for shape in title_slide.shapes:
-            if shape.has_text_frame:
-                for para in shape.text_frame.paragraphs:
-                    if para.font.color.rgb:
-                        # RGBColor is tuple-like: (r, g, b)
-                        if para.font.color.rgb[0] == 255:
-                            found_red = True
-                            break
-
+        # RGBColor is tuple-like: (r, g, b)
+        found_red = any(
+            para.font.color.rgb is not None and para.font.color.rgb[0] == 255
+            for shape in title_slide.shapes
+            if shape.has_text_frame
+            for para in shape.text_frame.paragraphs
+        )
         assert found_red, "Primary color should be applied to title"
 
-    def test_generate_with_footer_text(self):
+    @pytest.mark.parametrize("themed_pptx", [(True, True)], indirect=True)
+    def test_generate_with_footer_text(self, themed_pptx):
         """Test PPTX generation includes footer text when enabled."""
-        generator = PPTXGenerator()
-        theme = Theme(footer_text="© 2026 Test Company", show_footer=True)
-        steps_data = {
-            "title": "Test Manual",
-            "steps": [],
-        }
-
-        pptx_bytes = generator.generate(steps_data, {}, theme=theme)
-        prs = Presentation(io.BytesIO(pptx_bytes))
+        prs = Presentation(io.BytesIO(themed_pptx))
 
         # Check that footer text is in at least one slide
-        footer_found = False
-        for slide in prs.slides:
-            for shape in slide.shapes:
-                if shape.has_text_frame:
-                    for para in shape.text_frame.paragraphs:
-                        if "© 2026 Test Company" in para.text:
-                            footer_found = True
-                            break
-
+        footer_found = any(
+            _FOOTER_TEXT in para.text
+            for slide in prs.slides
+            for shape in slide.shapes
+            if shape.has_text_frame
+            for para in shape.text_frame.paragraphs
+        )
         assert footer_found, "Footer text should be included in PPTX"
+        # The raw slide XML scan used by the disabled test must find it too
+        assert _pptx_slides_contain(themed_pptx, _FOOTER_TEXT)
 
-    def test_generate_without_footer_when_disabled(self):
-        """Test PPTX generation excludes footer when show_footer=False."""
-        generator = PPTXGenerator()
-        theme = Theme(footer_text="© 2026 Test Company", show_footer=False)
-        steps_data = {
-            "title": "Test Manual",
-            "steps": [],
-        }
-
-        pptx_bytes = generator.generate(steps_data, {}, theme=theme)
-        prs = Presentation(io.BytesIO(pptx_bytes))
-
-        # Check that footer text is NOT in any slide
-        footer_found = False
-        for slide in prs.slides:
-            for shape in slide.shapes:
-                if shape.has_text_frame:
-                    for para in shape.text_frame.paragraphs:
-                        if "© 2026 Test Company" in para.text:
-                            footer_found = True
+    @pytest.mark.parametrize("themed_pptx", [(True, True)], indirect=True)
+    def test_generate_with_logo(self, themed_pptx):
+        """Test PPTX generation includes logo when provided."""
+        prs = Presentation(io.BytesIO(themed_pptx))
 
-        assert not footer_found, "Footer should not be included when disabled"
+        # Check that there's at least one picture shape
+        picture_found = any(
+            hasattr(shape, "image") for slide in prs.slides for shape in slide.shapes
+        )
+        assert picture_found, "Logo should be included in PPTX"
+        # The media-part check used by the disabled test must see it too
+        assert _pptx_has_media(themed_pptx)
 
-    def test_generate_with_logo(self):
-        """Test PPTX generation includes logo when provided."""
-        generator = PPTXGenerator()
-        theme = Theme(show_logo=True, logo_uri="s3://bucket/logo.png")
-        steps_data = {
-            "title": "Test Manual",
-            "steps": [],
-        }
+    @pytest.mark.parametrize("themed_pptx", [(False, True)], indirect=True)
+    def test_generate_without_footer_when_disabled(self, themed_pptx):
+        """Test PPTX generation excludes footer when show_footer=False."""
+        assert not _pptx_slides_contain(themed_pptx, _FOOTER_TEXT), (
+            "Footer should not be included when disabled"
+        )
 
-        # Create a temp PNG file for logo
-        with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as f:
-            # Create a minimal valid PNG
-            import struct
-            import zlib
-
-            def create_minimal_png():
-                """Create a minimal valid 1x1 PNG."""
-                signature = b"\x89PNG\r\n\x1a\n"
-                # IHDR chunk
-                width = 1
-                height = 1
-                bit_depth = 8
-                color_type = 2  # RGB
-                ihdr_data = struct.pack(">IIBBBBB", width, height, bit_depth, color_type, 0, 0, 0)
-                ihdr_crc = zlib.crc32(b"IHDR" + ihdr_data) & 0xFFFFFFFF
-                ihdr = struct.pack(">I", 13) + b"IHDR" + ihdr_data + struct.pack(">I", ihdr_crc)
-                # IDAT chunk (1x1 red pixel)
-                raw_data = b"\x00\xff\x00\x00"  # filter byte + RGB
-                compressed = zlib.compress(raw_data)
-                idat_crc = zlib.crc32(b"IDAT" + compressed) & 0xFFFFFFFF
-                idat = (
-                    struct.pack(">I", len(compressed))
-                    + b"IDAT"
-                    + compressed
-                    + struct.pack(">I", idat_crc)
-                )
-                # IEND chunk
-                iend_crc = zlib.crc32(b"IEND") & 0xFFFFFFFF
-                iend = struct.pack(">I", 0) + b"IEND" + struct.pack(">I", iend_crc)
-                return signature + ihdr + idat + iend
-
-            f.write(create_minimal_png())
-            logo_path = f.name
-
-        try:
-            pptx_bytes = generator.generate(steps_data, {}, theme=theme, logo_path=logo_path)
-            prs = Presentation(io.BytesIO(pptx_bytes))
-
-            # Check that there's at least one picture shape
-            picture_found = False
-            for slide in prs.slides:
-                for shape in slide.shapes:
-                    if hasattr(shape, "image"):
-                        picture_found = True
-                        break
-
-            assert picture_found, "Logo should be included in PPTX"
-        finally:
-            os.unlink(logo_path)
-
-    def test_generate_without_logo_when_disabled(self):
+    @pytest.mark.parametrize("themed_pptx", [(True, False)], indirect=True)
+    def test_generate_without_logo_when_disabled(self, themed_pptx):
         """Test PPTX generation excludes logo when show_logo=False."""
-        generator = PPTXGenerator()
-        theme = Theme(show_logo=False, logo_uri="s3://bucket/logo.png")
-        steps_data = {
-            "title": "Test Manual",
-            "steps": [],
-        }
+        # Check that no image was embedded (logo should be excluded)
+        assert not _pptx_has_media(themed_pptx), "Logo should not be included when disabled"
 
-        # Create a temp PNG file
-        with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as f:
-            import struct
-            import zlib
-
-            def create_minimal_png():
-                signature = b"\x89PNG\r\n\x1a\n"
-                width = 1
-                height = 1
-                bit_depth = 8
-                color_type = 2
-                ihdr_data = struct.pack(">IIBBBBB", width, height, bit_depth, color_type, 0, 0, 0)
-                ihdr_crc = zlib.crc32(b"IHDR" + ihdr_data) & 0xFFFFFFFF
-                ihdr = struct.pack(">I", 13) + b"IHDR" + ihdr_data + struct.pack(">I", ihdr_crc)
-                raw_data = b"\x00\xff\x00\x00"
-                compressed = zlib.compress(raw_data)
-                idat_crc = zlib.crc32(b"IDAT" + compressed) & 0xFFFFFFFF
-                idat = (
-                    struct.pack(">I", len(compressed))
-                    + b"IDAT"
-                    + compressed
-                    + struct.pack(">I", idat_crc)
-                )
-                iend_crc = zlib.crc32(b"IEND") & 0xFFFFFFFF
-                iend = struct.pack(">I", 0) + b"IEND" + struct.pack(">I", iend_crc)
-                return signature + ihdr + idat + iend
-
-            f.write(create_minimal_png())
-            logo_path = f.name
-
-        try:
-            pptx_bytes = generator.generate(steps_data, {}, theme=theme, logo_path=logo_path)
-            prs = Presentation(io.BytesIO(pptx_bytes))
-
-            # Check that there are no picture shapes (logo should be excluded)
-            picture_found = False
-            for slide in prs.slides:
-                for shape in slide.shapes:
-                    if hasattr(shape, "image"):
-                        picture_found = True
-
-            assert not picture_found, "Logo should not be included when disabled"
-        finally:
-            os.unlink(logo_path)
+
+@pytest.fixture(scope="module")
+def dummy_job_id() -> uuid.UUID:
+    """Job ID for requests rejected by body validation, so it never needs to exist."""
+    return uuid.uuid4()
 
 
 class TestThemeAPIValidation:
     """Tests for Theme API validation logic using conftest fixtures."""
 
-    def test_put_theme_validates_invalid_color_format(self, client):
-        """Test PUT /api/jobs/{job_id}/theme rejects invalid color format."""
-        import uuid
-
-        job_id = uuid.uuid4()
-        response = client.put(f"/api/jobs/{job_id}/theme", json={"primary_color": "invalid"})
-        assert response.status_code == 422
-
-    def test_put_theme_validates_invalid_color_without_hash(self, client):
-        """Test that color without # prefix is rejected."""
-        import uuid
-
-        job_id = uuid.uuid4()
-        response = client.put(f"/api/jobs/{job_id}/theme", json={"primary_color": "FF0000"})
-        assert response.status_code == 422
-
-    def test_put_theme_validates_color_too_short(self, client):
-        """Test that color with too few digits is rejected."""
-        import uuid
-
-        job_id = uuid.uuid4()
-        response = client.put(f"/api/jobs/{job_id}/theme", json={"primary_color": "#FFF"})
+    @pytest.mark.parametrize(
+        "primary_color",
+        ["invalid", "FF0000", "#FFF"],
+        ids=["not-hex", "missing-hash", "too-short"],
+    )
+    def test_put_theme_rejects_invalid_color(self, client, dummy_job_id, primary_color):
+        """Test PUT /api/jobs/{job_id}/theme rejects malformed colors before the job lookup."""
+        response = client.put(
+            f"/api/jobs/{dummy_job_id}/theme", json={"primary_color": primary_color}
+        )
         assert response.status_code == 422
 
     def test_get_theme_returns_default_for_succeeded_job(self, client, succeeded_job):
@@ -442,37 +423,11 @@ class TestThemeAPIValidation:
         assert response.status_code == 400
         assert "too large" in response.json()["detail"]
 
-    def test_logo_upload_succeeds_with_valid_file(self, client, succeeded_job):
+    def test_logo_upload_succeeds_with_valid_file(self, client, succeeded_job, minimal_png_bytes):
         """Test POST /api/jobs/{job_id}/theme/logo succeeds with valid PNG."""
-        import struct
-        import zlib
-
-        def create_minimal_png():
-            signature = b"\x89PNG\r\n\x1a\n"
-            width = 1
-            height = 1
-            bit_depth = 8
-            color_type = 2
-            ihdr_data = struct.pack(">IIBBBBB", width, height, bit_depth, color_type, 0, 0, 0)
-            ihdr_crc = zlib.crc32(b"IHDR" + ihdr_data) & 0xFFFFFFFF
-            ihdr = struct.pack(">I", 13) + b"IHDR" + ihdr_data + struct.pack(">I", ihdr_crc)
-            raw_data = b"\x00\xff\x00\x00"
-            compressed = zlib.compress(raw_data)
-            idat_crc = zlib.crc32(b"IDAT" + compressed) & 0xFFFFFFFF
-            idat = (
-                struct.pack(">I", len(compressed))
-                + b"IDAT"
-                + compressed
-                + struct.pack(">I", idat_crc)
-            )
-            iend_crc = zlib.crc32(b"IEND") & 0xFFFFFFFF
-            iend = struct.pack(">I", 0) + b"IEND" + struct.pack(">I", iend_crc)
-            return signature + ihdr + idat + iend
-
-        png_data = create_minimal_png()
         response = client.post(
             f"/api/jobs/{succeeded_job.id}/theme/logo",
-            files={"logo_file": ("logo.png", png_data, "image/png")},
+            files={"logo_file": ("logo.png", minimal_png_bytes, "image/png")},
         )
         assert response.status_code == 200
         assert "logo_uri" in response.json()
@@ -1,25 +1,25 @@
 """Tests for utility functions."""
 
+import pytest
+
 from app.utils.timecode import mmss_to_seconds, seconds_to_mmss
 
 
 class TestTimecode:
     """Tests for timecode utilities."""
 
-    def test_seconds_to_mmss_zero(self):
-        assert seconds_to_mmss(0) == "00:00"
-
-    def test_seconds_to_mmss_simple(self):
-        assert seconds_to_mmss(65) == "01:05"
-
-    def test_seconds_to_mmss_large(self):
-        assert seconds_to_mmss(3661) == "61:01"
-
-    def test_mmss_to_seconds_zero(self):
-        assert mmss_to_seconds("00:00") == 0
-
-    def test_mmss_to_seconds_simple(self):
-        assert mmss_to_seconds("01:30") == 90
-
-    def test_mmss_to_seconds_hhmmss(self):
-        assert mmss_to_seconds("01:01:30") == 3690
+    @pytest.mark.parametrize(
+        ("seconds", "mmss"),
+        [(0, "00:00"), (65, "01:05"), (3661, "61:01"), (6005.5, "100:05")],
+        ids=["zero", "simple", "large", "three-digit-minutes"],
+    )
+    def test_seconds_to_mmss(self, seconds, mmss):
+        assert seconds_to_mmss(seconds) == mmss
+
+    @pytest.mark.parametrize(
+        ("mmss", "seconds"),
+        [("00:00", 0), ("01:30", 90), ("01:01:30", 3690)],
+        ids=["zero", "simple", "hhmmss"],
+    )
+    def test_mmss_to_seconds(self, mmss, seconds):
+        assert mmss_to_seconds(mmss) == seconds